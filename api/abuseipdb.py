@@ -1,40 +1,35 @@
-import os
-import requests
+import aiohttp
+
+from api.lookup import CachedLookup
 
 ABUSE_API = "https://api.abuseipdb.com/api/v2/check"
 
-_CACHE = {}
+
+def _build_request(ip: str, api_key: str):
+    headers = {"Key": api_key, "Accept": "application/json"}
+    params = {"ipAddress": ip, "maxAgeInDays": 365}
+    return ABUSE_API, headers, params
+
+
+def _parse_response(status_code: int, payload: dict) -> dict:
+    if status_code == 200:
+        data = payload.get("data", {})
+        return {
+            "status": "ok",
+            "abuseConfidenceScore": data.get("abuseConfidenceScore"),
+            "totalReports": data.get("totalReports"),
+            "isWhitelisted": data.get("isWhitelisted"),
+        }
+    return {"status": f"http_{status_code}"}
+
+
+_LOOKUP = CachedLookup("abuse", "ABUSEIPDB_API_KEY", _build_request, _parse_response)
 
 
 def enrich_ip_with_abuseipdb(ip: str) -> dict:
-    if not ip:
-        return {"status": "no_ip"}
-    if ip in _CACHE:
-        return _CACHE[ip]
-
-    api_key = os.getenv("ABUSEIPDB_API_KEY")
-    if not api_key:
-        res = {"status": "no_key"}
-        _CACHE[ip] = res
-        return res
-    try:
-        headers = {"Key": api_key, "Accept": "application/json"}
-        params = {"ipAddress": ip, "maxAgeInDays": 365}
-        resp = requests.get(ABUSE_API, headers=headers, params=params, timeout=8)
-        if resp.status_code == 200:
-            data = resp.json().get("data", {})
-            res = {
-                "status": "ok",
-                "abuseConfidenceScore": data.get("abuseConfidenceScore"),
-                "totalReports": data.get("totalReports"),
-                "isWhitelisted": data.get("isWhitelisted"),
-            }
-            _CACHE[ip] = res
-            return res
-        res = {"status": f"http_{resp.status_code}"}
-        _CACHE[ip] = res
-        return res
-    except Exception as e:
-        res = {"status": "error", "error": str(e)}
-        _CACHE[ip] = res
-        return res
+    return _LOOKUP.fetch(ip)
+
+
+async def enrich_ip_with_abuseipdb_async(session: aiohttp.ClientSession, ip: str) -> dict:
+    """Non-blocking variant of enrich_ip_with_abuseipdb sharing the same cache."""
+    return await _LOOKUP.fetch_async(session, ip)
@@ -0,0 +1,149 @@
+import os
+import asyncio
+import threading
+import weakref
+from typing import Callable, Dict, Optional, Tuple
+
+import aiohttp
+import diskcache
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CACHE_TTL = 24 * 3600
+# failed lookups are retried sooner so transient errors don't stick
+NEGATIVE_CACHE_TTL = 300
+# roughly tens of thousands of IPs; least recently used entries are evicted past this
+CACHE_SIZE_LIMIT = 32 * 1024 * 1024
+REQUEST_TIMEOUT = 8
+# both fetch paths retry rate limits, server errors and dropped connections
+# with exponential backoff, then surface the last status as http_<code>
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.3
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# pooled keep-alive connections for the blocking path
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_maxsize=20,
+        max_retries=Retry(
+            total=MAX_RETRIES,
+            backoff_factor=BACKOFF_FACTOR,
+            status_forcelist=sorted(RETRY_STATUSES),
+            raise_on_status=False,
+        ),
+    ),
+)
+
+# (url, headers, params) for one IP, given the provider's API key
+BuildRequest = Callable[[str, str], Tuple[str, Dict[str, str], Optional[Dict]]]
+ParseResponse = Callable[[int, dict], dict]
+
+
+class CachedLookup:
+    """Disk-cached, per-IP-serialized lookups against one threat-intel API.
+
+    Providers supply how to build the request and parse a response; the
+    caching, locking and HTTP handling are shared.
+    """
+
+    def __init__(self, name: str, api_key_env: str, build_request: BuildRequest, parse_response: ParseResponse):
+        self.api_key_env = api_key_env
+        self.build_request = build_request
+        self.parse_response = parse_response
+        self.cache = diskcache.Cache(
+            os.path.join("cache", name), size_limit=CACHE_SIZE_LIMIT, eviction_policy="least-recently-used"
+        )
+        # one lock per IP being fetched, so concurrent sessions don't issue duplicate requests;
+        # entries disappear once no caller holds a reference
+        self._locks = weakref.WeakValueDictionary()
+        self._locks_guard = threading.Lock()
+
+    def _remember(self, ip: str, res: dict) -> dict:
+        expire = CACHE_TTL if res.get("status") == "ok" else NEGATIVE_CACHE_TTL
+        self.cache.set(ip, res, expire=expire)
+        return res
+
+    def _lock_for(self, ip: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(ip)
+            if lock is None:
+                lock = threading.Lock()
+                self._locks[ip] = lock
+            return lock
+
+    def _prepare(self, ip: str):
+        """Return (result, request); request is None when no fetch is needed."""
+        cached = self.cache.get(ip)
+        if cached is not None:
+            return cached, None
+        api_key = os.getenv(self.api_key_env)
+        if not api_key:
+            return self._remember(ip, {"status": "no_key"}), None
+        url, headers, params = self.build_request(ip, api_key)
+        return None, {"url": url, "headers": headers, "params": params}
+
+    def fetch(self, ip: str) -> dict:
+        if not ip:
+            return {"status": "no_ip"}
+        cached = self.cache.get(ip)
+        if cached is not None:
+            return cached
+
+        with self._lock_for(ip):
+            # another thread may have fetched it while we waited
+            res, request = self._prepare(ip)
+            if request is None:
+                return res
+            try:
+                resp = _SESSION.get(**request, timeout=REQUEST_TIMEOUT)
+                payload = resp.json() if resp.status_code == 200 else {}
+                res = self.parse_response(resp.status_code, payload)
+            except Exception as e:
+                res = {"status": "error", "error": str(e)}
+            return self._remember(ip, res)
+
+    async def fetch_async(self, session: aiohttp.ClientSession, ip: str) -> dict:
+        """Non-blocking variant of fetch sharing the same cache."""
+        if not ip:
+            return {"status": "no_ip"}
+        cached = self.cache.get(ip)
+        if cached is not None:
+            return cached
+
+        lock = self._lock_for(ip)
+        if not lock.acquire(blocking=False):
+            # a fetch for this IP is already in flight; wait for it off the event loop
+            return await asyncio.to_thread(self.fetch, ip)
+        try:
+            res, request = self._prepare(ip)
+            if request is None:
+                return res
+            try:
+                res = await self._get_async(session, request)
+            except Exception as e:
+                res = {"status": "error", "error": str(e)}
+            return self._remember(ip, res)
+        finally:
+            lock.release()
+
+    async def _get_async(self, session: aiohttp.ClientSession, request: dict) -> dict:
+        """GET and parse, retrying like the blocking session's adapter does."""
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        for attempt in range(MAX_RETRIES + 1):
+            delay = BACKOFF_FACTOR * 2**attempt
+            last = attempt == MAX_RETRIES
+            try:
+                async with session.get(**request, timeout=timeout) as resp:
+                    if resp.status not in RETRY_STATUSES or last:
+                        payload = await resp.json() if resp.status == 200 else {}
+                        return self.parse_response(resp.status, payload)
+                    retry_after = resp.headers.get("Retry-After", "")
+                    if retry_after.isdigit():
+                        delay = max(delay, min(int(retry_after), REQUEST_TIMEOUT))
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if last:
+                    raise
+            await asyncio.sleep(delay)
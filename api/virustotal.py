@@ -1,40 +1,33 @@
-import os
-import requests
+import aiohttp
+
+from api.lookup import CachedLookup
 
 VT_API = "https://www.virustotal.com/api/v3/ip_addresses/{ip}"
 
-_CACHE = {}
+
+def _build_request(ip: str, api_key: str):
+    return VT_API.format(ip=ip), {"x-apikey": api_key}, None
+
+
+def _parse_response(status_code: int, data: dict) -> dict:
+    if status_code == 200:
+        stats = data.get("data", {}).get("attributes", {}).get("last_analysis_stats", {})
+        return {
+            "status": "ok",
+            "malicious": stats.get("malicious"),
+            "suspicious": stats.get("suspicious"),
+            "harmless": stats.get("harmless"),
+        }
+    return {"status": f"http_{status_code}"}
+
+
+_LOOKUP = CachedLookup("vt", "VT_API_KEY", _build_request, _parse_response)
 
 
 def enrich_ip_with_virustotal(ip: str) -> dict:
-    if not ip:
-        return {"status": "no_ip"}
-    if ip in _CACHE:
-        return _CACHE[ip]
-
-    api_key = os.getenv("VT_API_KEY")
-    if not api_key:
-        res = {"status": "no_key"}
-        _CACHE[ip] = res
-        return res
-    try:
-        headers = {"x-apikey": api_key}
-        resp = requests.get(VT_API.format(ip=ip), headers=headers, timeout=8)
-        if resp.status_code == 200:
-            data = resp.json()
-            stats = data.get("data", {}).get("attributes", {}).get("last_analysis_stats", {})
-            res = {
-                "status": "ok",
-                "malicious": stats.get("malicious"),
-                "suspicious": stats.get("suspicious"),
-                "harmless": stats.get("harmless"),
-            }
-            _CACHE[ip] = res
-            return res
-        res = {"status": f"http_{resp.status_code}"}
-        _CACHE[ip] = res
-        return res
-    except Exception as e:
-        res = {"status": "error", "error": str(e)}
-        _CACHE[ip] = res
-        return res
+    return _LOOKUP.fetch(ip)
+
+
+async def enrich_ip_with_virustotal_async(session: aiohttp.ClientSession, ip: str) -> dict:
+    """Non-blocking variant of enrich_ip_with_virustotal sharing the same cache."""
+    return await _LOOKUP.fetch_async(session, ip)
@@ -1,19 +1,26 @@
 import os
 import io
 import time
+import asyncio
+import aiohttp
+import numpy as np
 import pandas as pd
 import streamlit as st
+from typing import Optional
 from dotenv import load_dotenv
 
-from model.predict import load_or_train_model, predict_batch, explain_prediction
-from utils.feature_engineering import preprocess_dataframe, canonicalize_columns
+from model.predict import LABELS, load_or_train_model, predict_batch, explain_prediction
+from utils.feature_engineering import preprocess_dataframe, canonicalize_columns, canonical_column_map
 from utils.recommendations import recommend_actions
-from utils.reporting import generate_pdf_report
-from api.virustotal import enrich_ip_with_virustotal
-from api.abuseipdb import enrich_ip_with_abuseipdb
+from utils.reporting import generate_pdf_report, report_filename
+from api.virustotal import enrich_ip_with_virustotal_async
+from api.abuseipdb import enrich_ip_with_abuseipdb_async
 
 load_dotenv()
 
+# derived frames (renames, column selections, result tables) share data until written
+pd.options.mode.copy_on_write = True
+
 st.set_page_config(page_title="SOC Assistant", layout="wide")
 st.title("🔎 SOC Assistant - AI-powered Alert Analysis")
 
@@ -24,6 +31,27 @@ def load_sample() -> pd.DataFrame:
         return pd.read_csv(path)
     return pd.DataFrame()
 
+# dtypes for canonical columns; keyed by canonical name since raw headers vary
+CSV_DTYPES = {
+    "source_ip": "string",
+    "destination_ip": "string",
+    "event_type": "category",
+    "username": "category",
+    "status": "category",
+}
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_upload(csv_bytes: bytes, max_rows: Optional[int]) -> pd.DataFrame:
+    header = pd.read_csv(io.BytesIO(csv_bytes), nrows=0).columns
+    dtype = {raw: CSV_DTYPES[name] for raw, name in canonical_column_map(header).items() if name in CSV_DTYPES}
+    raw_df = pd.read_csv(io.BytesIO(csv_bytes), nrows=max_rows, dtype=dtype, engine="c")
+    return canonicalize_columns(raw_df)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def preprocess_upload(csv_bytes: bytes, max_rows: Optional[int]) -> pd.DataFrame:
+    # keyed on the raw bytes so reruns from unrelated widgets skip feature engineering
+    return preprocess_dataframe(load_upload(csv_bytes, max_rows))
+
 @st.cache_resource(show_spinner=True)
 def get_model():
     return load_or_train_model(
@@ -31,6 +59,41 @@ def get_model():
         model_path=os.path.join("model", "model.pkl"),
     )
 
+async def _gather_enrichment(ips, on_progress=None):
+    """Query VirusTotal and AbuseIPDB for every IP concurrently; results keep input order."""
+    connector = aiohttp.TCPConnector(limit=20)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        tasks = [
+            asyncio.ensure_future(
+                asyncio.gather(
+                    enrich_ip_with_virustotal_async(session, ip),
+                    enrich_ip_with_abuseipdb_async(session, ip),
+                )
+            )
+            for ip in ips
+        ]
+        if on_progress is not None and tasks:
+            done = 0
+
+            def _tick(_):
+                nonlocal done
+                done += 1
+                on_progress(done / len(tasks))
+
+            for task in tasks:
+                task.add_done_callback(_tick)
+        return await asyncio.gather(*tasks)
+
+def enrich_batch(ips, on_progress=None):
+    """Enrich each distinct IP once; return (vt_map, abuse_map) keyed by IP."""
+    unique_ips = list(dict.fromkeys(ips))
+    if not unique_ips:
+        return {}, {}
+    results = asyncio.run(_gather_enrichment(unique_ips, on_progress))
+    vt_map = {ip: vt for ip, (vt, _) in zip(unique_ips, results)}
+    abuse_map = {ip: ab for ip, (_, ab) in zip(unique_ips, results)}
+    return vt_map, abuse_map
+
 with st.sidebar:
     st.header("Inputs")
     uploaded = st.file_uploader("Upload CSV logs", type=["csv"]) 
@@ -64,14 +127,17 @@ with st.sidebar:
 model = get_model()
 sample_df = load_sample()
 
+row_limit = None if analyze_all else int(max_rows)
+upload_bytes = None
+
 st.subheader("Data Preview")
 if uploaded is not None:
     try:
-        raw_df = pd.read_csv(uploaded)
-        user_df = canonicalize_columns(raw_df)
-        if not analyze_all and len(user_df) > max_rows:
-            st.info(f"Truncating {len(user_df)} rows to first {max_rows} for performance.")
-            user_df = user_df.head(max_rows)
+        csv_bytes = uploaded.getvalue()
+        user_df = load_upload(csv_bytes, row_limit)
+        upload_bytes = csv_bytes
+        if row_limit is not None and len(user_df) == row_limit:
+            st.info(f"Reading only the first {row_limit} rows for performance.")
         st.dataframe(user_df.head(50), use_container_width=True)
     except Exception as e:
         st.error(f"Failed to read CSV: {e}")
@@ -90,25 +156,20 @@ if run_btn:
         user_df = canonicalize_columns(user_df)
 
     with st.spinner("Analyzing..."):
-        processed = preprocess_dataframe(user_df)
+        if upload_bytes is not None:
+            processed = preprocess_upload(upload_bytes, row_limit)
+        else:
+            processed = preprocess_dataframe(user_df)
         preds, probs = predict_batch(model, processed)
 
         # Map to labels
-        labels = []
-        risk_scores = []
-        for p, pr in zip(preds, probs):
-            risk = float(pr.max()) if hasattr(pr, "max") else float(pr)
-            risk_scores.append(risk)
-            if risk >= 0.8:
-                labels.append("malicious")
-            elif risk >= 0.5:
-                labels.append("suspicious")
-            else:
-                labels.append("benign")
-
-        result_df = user_df.copy()
-        result_df["risk_score"] = risk_scores
-        result_df["classification"] = labels
+        risks = np.asarray(probs).max(axis=1)
+        labels = np.select([risks >= 0.8, risks >= 0.5], ["malicious", "suspicious"], default="benign")
+
+        result_df = user_df.assign(
+            risk_score=risks.astype(np.float32),
+            classification=pd.Categorical(labels, categories=LABELS),
+        )
 
         # Threat intel enrichment (only top-K by risk)
         enriched_rows = []
@@ -116,24 +177,24 @@ if run_btn:
             top_idx = result_df["risk_score"].nlargest(min(max_enrich, len(result_df))).index
             to_enrich = result_df.loc[top_idx]
             prog = st.progress(0.0, text="Enriching threat intel...")
-            total = len(to_enrich)
-            for i, (_, row) in enumerate(to_enrich.iterrows(), start=1):
+            # duplicate canonical headers would break reindex; keep the first of each
+            to_enrich = to_enrich.loc[:, ~to_enrich.columns.duplicated()]
+            ip_pairs = to_enrich.reindex(columns=["source_ip", "destination_ip"], fill_value="").to_numpy()
+            unique_ips = {ip for ip in ip_pairs.ravel() if isinstance(ip, str) and len(ip) > 0}
+            vt_map, abuse_map = enrich_batch(sorted(unique_ips), on_progress=prog.progress)
+            for src, dst in ip_pairs:
                 row_info = {
-                    "source_ip": row.get("source_ip", ""),
-                    "destination_ip": row.get("destination_ip", ""),
+                    "source_ip": src,
+                    "destination_ip": dst,
                     "vt": {},
                     "abuse": {},
                 }
-                for ip_field in ["source_ip", "destination_ip"]:
-                    ip = row.get(ip_field)
+                for ip_field, ip in (("source_ip", src), ("destination_ip", dst)):
                     if isinstance(ip, str) and len(ip) > 0:
-                        vt = enrich_ip_with_virustotal(ip)
-                        ab = enrich_ip_with_abuseipdb(ip)
-                        row_info["vt"][ip_field] = vt
-                        row_info["abuse"][ip_field] = ab
+                        row_info["vt"][ip_field] = vt_map[ip]
+                        row_info["abuse"][ip_field] = abuse_map[ip]
                 enriched_rows.append(row_info)
-                if total:
-                    prog.progress(i / total)
+            prog.progress(1.0)
         else:
             enriched_rows = []
 
@@ -165,23 +226,23 @@ if run_btn:
 # Report section rendered independently so button persists across reruns
 st.subheader("Report")
 if "soc_result_df" in st.session_state and "soc_enriched" in st.session_state:
+    save_copy = st.checkbox("Also save a copy to reports/", value=False)
     if st.button("Generate PDF Report"):
-        file_path = generate_pdf_report(
+        file_name = report_filename()
+        out_path = os.path.join("reports", file_name) if save_copy else None
+        pdf_bytes = generate_pdf_report(
             alerts_df=st.session_state["soc_result_df"],
             enrichment=st.session_state["soc_enriched"],
-            out_dir="reports",
+            out_path=out_path,
+        )
+        if out_path:
+            st.success(f"Report saved to {out_path}")
+        st.download_button(
+            label="Download PDF",
+            data=pdf_bytes,
+            file_name=file_name,
+            mime="application/pdf",
         )
-        st.success(f"Report saved to {file_path}")
-        try:
-            with open(file_path, "rb") as f:
-                st.download_button(
-                    label="Download PDF",
-                    data=f,
-                    file_name=os.path.basename(file_path),
-                    mime="application/pdf",
-                )
-        except Exception:
-            pass
 else:
     st.caption("Run analysis first to enable report generation.")
 
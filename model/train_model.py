@@ -1,18 +1,39 @@
 import os
 import argparse
 import joblib
+import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.inspection import permutation_importance
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
+from sklearn.preprocessing import OrdinalEncoder
 
-from utils.feature_engineering import preprocess_dataframe
+from utils.feature_engineering import preprocess_dataframe, BASE_NUMERIC_FEATURES, CATEGORICAL_FEATURES
 
 
 class SOCModel:
-    def __init__(self, clf: RandomForestClassifier, feature_names):
+    def __init__(self, clf: HistGradientBoostingClassifier, transformer: ColumnTransformer, feature_names, importances=None):
         self.clf = clf
+        self.transformer = transformer
         self.feature_names = list(feature_names)
+        self.feature_index = {name: i for i, name in enumerate(self.feature_names)}
+        self.importances = importances
+
+    def transform(self, processed_df: pd.DataFrame) -> np.ndarray:
+        """Fill the classifier's float64 input matrix column by column.
+
+        Numeric features are copied straight from the frame; only the
+        categoricals go through the fitted encoder.
+        """
+        X = np.empty((len(processed_df), len(self.feature_names)), dtype=np.float64)
+        for col in BASE_NUMERIC_FEATURES:
+            X[:, self.feature_index[col]] = processed_df[col].to_numpy()
+        encoder = self.transformer.named_transformers_["cat"]
+        cat_idx = [self.feature_index[col] for col in CATEGORICAL_FEATURES]
+        X[:, cat_idx] = encoder.transform(processed_df[CATEGORICAL_FEATURES])
+        return X
 
     def predict_proba(self, X):
         return self.clf.predict_proba(X)
@@ -22,12 +43,39 @@ class SOCModel:
 
     @property
     def feature_importances_(self):
+        if self.importances is not None:
+            return self.importances
         return getattr(self.clf, "feature_importances_", None)
 
 
 LABEL_MAP = {"benign": 0, "suspicious": 1, "malicious": 2}
 INV_LABEL_MAP = {v: k for k, v in LABEL_MAP.items()}
 
+# HistGradientBoosting needs categorical codes below max_bins (255)
+MAX_CATEGORIES = 255
+
+
+def build_transformer() -> ColumnTransformer:
+    """Pass numeric features through and ordinal-encode the categoricals.
+
+    Unseen categories map to NaN, which the classifier treats as missing.
+    """
+    return ColumnTransformer(
+        [
+            ("num", "passthrough", BASE_NUMERIC_FEATURES),
+            (
+                "cat",
+                OrdinalEncoder(
+                    handle_unknown="use_encoded_value",
+                    unknown_value=np.nan,
+                    max_categories=MAX_CATEGORIES,
+                ),
+                CATEGORICAL_FEATURES,
+            ),
+        ],
+        verbose_feature_names_out=False,
+    )
+
 
 def train(data_path: str, out_path: str):
     df = pd.read_csv(data_path)
@@ -41,23 +89,37 @@ def train(data_path: str, out_path: str):
     vc = y.value_counts()
     can_stratify = (vc.min() >= 2) and (vc.size >= 2) and (len(y) >= 5)
 
-    clf = RandomForestClassifier(n_estimators=200, max_depth=None, random_state=42, n_jobs=-1)
+    is_categorical = [False] * len(BASE_NUMERIC_FEATURES) + [True] * len(CATEGORICAL_FEATURES)
+    clf = HistGradientBoostingClassifier(
+        max_iter=200, learning_rate=0.1, categorical_features=is_categorical, random_state=42
+    )
+    transformer = build_transformer()
 
     if can_stratify:
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=0.2, random_state=42, stratify=y
         )
-        clf.fit(X_train, y_train)
+        clf.fit(transformer.fit_transform(X_train), y_train)
+        X_eval, y_eval = transformer.transform(X_test), y_test
         try:
-            y_pred = clf.predict(X_test)
+            y_pred = clf.predict(X_eval)
             print(classification_report(y_test, y_pred))
         except Exception:
             pass
     else:
         # Small/imbalanced dataset: fit on all data without split
-        clf.fit(X, y)
-
-    model = SOCModel(clf=clf, feature_names=X.columns)
+        X_eval, y_eval = transformer.fit_transform(X), y
+        clf.fit(X_eval, y_eval)
+
+    # gradient boosting has no impurity-based feature_importances_
+    importances = permutation_importance(clf, X_eval, y_eval, n_repeats=5, random_state=42).importances_mean
+
+    model = SOCModel(
+        clf=clf,
+        transformer=transformer,
+        feature_names=transformer.get_feature_names_out(),
+        importances=importances,
+    )
     os.makedirs(os.path.dirname(out_path), exist_ok=True)
     joblib.dump(model, out_path)
     print(f"Saved model to {out_path}")
@@ -1,7 +1,7 @@
 import ipaddress
 import pandas as pd
 import numpy as np
-from typing import List, Dict
+from typing import Dict, Tuple
 
 
 BASE_NUMERIC_FEATURES = [
@@ -80,6 +80,9 @@ ALIASES: Dict[str, str] = {
     "action": "status",
 }
 
+# earlier aliases win when several map to the same missing target
+_ALIAS_RANK: Dict[str, int] = {alias: i for i, alias in enumerate(ALIASES)}
+
 
 def ip_to_int(ip: str) -> int:
     try:
@@ -95,82 +98,156 @@ def is_private(ip: str) -> int:
         return 0
 
 
+_OCTET = r"(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+_IPV4_RE = r"\.".join([_OCTET] * 4)
+
+# (network, netmask) pairs mirroring ipaddress.IPv4Address.is_private
+_PRIVATE_V4_RANGES = [
+    (int(net.network_address), int(net.netmask))
+    for net in map(
+        ipaddress.ip_network,
+        [
+            "0.0.0.0/8",
+            "10.0.0.0/8",
+            "127.0.0.0/8",
+            "169.254.0.0/16",
+            "172.16.0.0/12",
+            "192.0.0.0/29",
+            "192.0.0.170/31",
+            "192.0.2.0/24",
+            "192.168.0.0/16",
+            "198.18.0.0/15",
+            "198.51.100.0/24",
+            "203.0.113.0/24",
+            "240.0.0.0/4",
+            "255.255.255.255/32",
+        ],
+    )
+]
+
+
+def _ip_features_unique(values: pd.Index) -> Tuple[np.ndarray, np.ndarray]:
+    n = len(values)
+    as_str = pd.Series(values, dtype=object).astype(str)
+    is_v4 = as_str.str.fullmatch(_IPV4_RE).to_numpy(dtype=bool)
+    ints = np.zeros(n, dtype=np.uint32)
+    if is_v4.any():
+        octets = as_str[is_v4].str.split(".", expand=True).to_numpy(dtype=np.uint32)
+        ints[is_v4] = (octets[:, 0] << 24) | (octets[:, 1] << 16) | (octets[:, 2] << 8) | octets[:, 3]
+    private = np.zeros(n, dtype=bool)
+    for network, netmask in _PRIVATE_V4_RANGES:
+        private |= (ints & netmask) == network
+    private &= is_v4
+    private = private.astype(np.uint8)
+
+    fallback = ~is_v4
+    if fallback.any():
+        others = np.asarray(values, dtype=object)[fallback]
+        ints = ints.astype(object)
+        ints[fallback] = [ip_to_int(ip) for ip in others]
+        private[fallback] = [is_private(ip) for ip in others]
+        # IPv6 addresses don't fit in 32 bits; keep the wider type only then
+        if max(ints[fallback]) <= 0xFFFFFFFF:
+            ints = ints.astype(np.uint32)
+    return ints, private
+
+
+def ip_features(ips: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """Vectorized equivalent of ip_to_int/is_private over a Series of addresses.
+
+    Each distinct address is parsed once and the results are mapped back
+    onto the rows. Dotted-quad IPv4 strings are parsed with NumPy; anything
+    else (IPv6, garbage) falls back to the per-value ipaddress helpers.
+    """
+    codes, uniques = pd.factorize(ips, use_na_sentinel=False)
+    ints, private = _ip_features_unique(uniques)
+    ints = pd.Series(ints[codes], index=ips.index).infer_objects()
+    return ints, pd.Series(private[codes], index=ips.index)
+
+
 def _ensure_series(df: pd.DataFrame, column: str, default_value) -> pd.Series:
     if column in df.columns:
         val = df[column]
         if isinstance(val, pd.Series):
             return val
-        return pd.Series([val] * len(df))
-    return pd.Series([default_value] * len(df))
+        if isinstance(val, pd.DataFrame):
+            # several raw headers normalized to the same name; use the first
+            return val.iloc[:, 0]
+        return pd.Series([val] * len(df), index=df.index)
+    return pd.Series([default_value] * len(df), index=df.index)
+
+
+def canonical_column_map(columns) -> Dict:
+    """Map each raw column name to its normalized/aliased canonical name."""
+    # normalize: lower, strip, replace spaces and dashes with underscores
+    norm_map = {c: str(c).strip().lower().replace(" ", "_").replace("-", "_") for c in columns}
+
+    # pick at most one alias per canonical name that isn't already present
+    present = set(norm_map.values())
+    alias_for: Dict[str, str] = {}
+    for norm in present:
+        target = ALIASES.get(norm)
+        if target is None or target in present:
+            continue
+        best = alias_for.get(target)
+        if best is None or _ALIAS_RANK[norm] < _ALIAS_RANK[best]:
+            alias_for[target] = norm
+    renames = {alias: target for target, alias in alias_for.items()}
+
+    return {c: renames.get(norm, norm) for c, norm in norm_map.items()}
 
 
 def canonicalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     """Normalize column names and map common aliases to expected names."""
     if df is None or df.empty:
         return df
-    new_df = df.copy()
-    # normalize: lower, strip, replace spaces and dashes with underscores
-    norm_map = {}
-    for c in list(new_df.columns):
-        norm = str(c).strip().lower().replace(" ", "_").replace("-", "_")
-        norm_map[c] = norm
-    new_df.rename(columns=norm_map, inplace=True)
-
-    # apply alias mapping
-    for alias, target in ALIASES.items():
-        if alias in new_df.columns and target not in new_df.columns:
-            new_df.rename(columns={alias: target}, inplace=True)
-    return new_df
+    return df.rename(columns=canonical_column_map(df.columns))
 
 
 def preprocess_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     df = canonicalize_columns(df)
-    df = df.copy()
 
     # timestamp-derived - ensure a Series, not a scalar NaT
     if "timestamp" in df.columns and isinstance(df["timestamp"], pd.Series):
         ts = pd.to_datetime(df["timestamp"], errors="coerce", utc=True)
     else:
-        ts = pd.Series([pd.NaT] * len(df), dtype="datetime64[ns, UTC]")
-    df["hour"] = ts.dt.hour.fillna(0).astype(int)
-    df["is_weekend"] = ts.dt.dayofweek.isin([5, 6]).fillna(False).astype(int)
+        ts = pd.Series([pd.NaT] * len(df), index=df.index, dtype="datetime64[ns, UTC]")
 
     # IP features (force Series)
     src_ip_series = _ensure_series(df, "source_ip", "").fillna("")
     dst_ip_series = _ensure_series(df, "destination_ip", "").fillna("")
-
-    df["src_ip_int"] = src_ip_series.apply(ip_to_int)
-    df["dst_ip_int"] = dst_ip_series.apply(ip_to_int)
-    df["src_is_private"] = src_ip_series.apply(is_private)
-    df["dst_is_private"] = dst_ip_series.apply(is_private)
-
-    # Ensure categorical columns exist as Series
-    for col in CATEGORICAL_FEATURES:
-        if col not in df.columns or not isinstance(df[col], pd.Series):
-            df[col] = pd.Series(["unknown"] * len(df))
-
-    # Categorical one-hot
-    cat_df = pd.get_dummies(
-        df[CATEGORICAL_FEATURES].fillna("unknown"),
-        prefix=CATEGORICAL_FEATURES,
-        dtype=np.uint8,
+    src_ip_int, src_is_private = ip_features(src_ip_series)
+    dst_ip_int, dst_is_private = ip_features(dst_ip_series)
+
+    # Features go into a new frame, so the input never needs a defensive copy
+    X = pd.DataFrame(
+        {
+            "hour": ts.dt.hour.fillna(0).astype(np.uint8),
+            "is_weekend": ts.dt.dayofweek.isin([5, 6]).fillna(False).astype(np.uint8),
+            "src_is_private": src_is_private,
+            "dst_is_private": dst_is_private,
+            "src_ip_int": src_ip_int,
+            "dst_ip_int": dst_ip_int,
+        },
+        index=df.index,
     )
 
-    X = pd.concat([df[BASE_NUMERIC_FEATURES], cat_df], axis=1)
-    # Ensure numeric types
+    # Categoricals stay as strings; the model's fitted encoder handles them
+    for col in CATEGORICAL_FEATURES:
+        if col in df.columns and isinstance(df[col], pd.Series):
+            s = df[col]
+        else:
+            s = pd.Series("unknown", index=df.index)
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            # category columns (typed CSV reads) already hold strings; just add the fill value
+            if "unknown" not in s.cat.categories:
+                s = s.cat.add_categories("unknown")
+            X[col] = s.fillna("unknown")
+        else:
+            X[col] = s.fillna("unknown").astype(str)
+    # Ensure numeric types; integer columns can't hold NaN, so only the others
+    # (e.g. IPv6 integers kept as objects) are coerced and filled, in one pass each
     for c in BASE_NUMERIC_FEATURES:
-        if X[c].dtype.kind not in ("i", "u", "f"):
+        if X[c].dtype.kind not in ("i", "u"):
             X[c] = pd.to_numeric(X[c], errors="coerce").fillna(0)
-    X = X.fillna(0)
-    return X
-
-
-def align_features(X: pd.DataFrame, feature_names: List[str]) -> pd.DataFrame:
-    X = X.copy()
-    for col in feature_names:
-        if col not in X.columns:
-            X[col] = 0
-    # drop unexpected columns
-    X = X[feature_names]
-    X = X.fillna(0)
     return X
@@ -4,14 +4,16 @@ import pandas as pd
 
 def recommend_actions(result_df: pd.DataFrame) -> List[str]:
     actions = []
-    if (result_df["classification"] == "malicious").any():
+    # one pass over the (categorical) column instead of a string scan per label
+    counts = result_df["classification"].value_counts()
+    if counts.get("malicious", 0) > 0:
         actions.append("Isolate affected hosts or user accounts immediately.")
         actions.append("Block malicious IPs/domains at firewall and proxy.")
         actions.append("Collect forensic artifacts (memory, disk, logs).")
-    if (result_df["classification"] == "suspicious").any():
+    if counts.get("suspicious", 0) > 0:
         actions.append("Increase monitoring and enable detailed logging for affected entities.")
         actions.append("Validate user actions with the business owner.")
-    if (result_df["classification"] == "benign").all():
+    if counts.get("benign", 0) == len(result_df):
         actions.append("No immediate action required; continue routine monitoring.")
     # General
     actions.append("Create/Update incident ticket and document findings.")
@@ -1,6 +1,7 @@
 import os
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import numpy as np
 import pandas as pd
 from fpdf import FPDF
 from fpdf.errors import FPDFException
@@ -62,11 +63,34 @@ def _write_wrapped(pdf: FPDF, text: str, h: float = 5):
         pdf.multi_cell(w, h, "[content truncated]")
 
 
-def generate_pdf_report(alerts_df: pd.DataFrame, enrichment: List[Dict[str, Any]], out_dir: str = "reports") -> str:
-    os.makedirs(out_dir, exist_ok=True)
+def _write_lines(pdf: FPDF, lines: List[str], h: float = 5, gap: float = 1):
+    """Render pre-formatted lines at full width with a small gap after each."""
+    w = _page_width(pdf)
+    for line in lines:
+        s = _shorten(line, 500)
+        pdf.set_x(pdf.l_margin)
+        try:
+            pdf.multi_cell(w, h, s)
+        except FPDFException:
+            _write_wrapped(pdf, s, h=h)
+        pdf.ln(gap)
+
+
+def _format_field(col: str, val) -> str:
+    if isinstance(val, (float, np.floating)) and col == "risk_score" and not pd.isna(val):
+        val = f"{val:.2f}"
+    return f"{col}: {_shorten(val, 160)}"
+
+
+def report_filename() -> str:
     ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    out_path = os.path.join(out_dir, f"soc_report_{ts}.pdf")
+    return f"soc_report_{ts}.pdf"
+
 
+def generate_pdf_report(
+    alerts_df: pd.DataFrame, enrichment: List[Dict[str, Any]], out_path: Optional[str] = None
+) -> bytes:
+    """Render the report in memory; also write it to `out_path` when given."""
     # Normalize columns so canonical fields are detected
     alerts_df = canonicalize_columns(alerts_df)
 
@@ -86,10 +110,10 @@ def generate_pdf_report(alerts_df: pd.DataFrame, enrichment: List[Dict[str, Any]
     _write_wrapped(pdf, "Summary", h=8)
     pdf.set_font("Arial", size=11)
     n = len(alerts_df)
-    cls_series = alerts_df.get("classification", pd.Series([], dtype=object))
-    n_mal = (cls_series == "malicious").sum()
-    n_sus = (cls_series == "suspicious").sum()
-    n_ben = (cls_series == "benign").sum()
+    cls_counts = alerts_df.get("classification", pd.Series([], dtype=object)).value_counts()
+    n_mal = cls_counts.get("malicious", 0)
+    n_sus = cls_counts.get("suspicious", 0)
+    n_ben = cls_counts.get("benign", 0)
     _write_wrapped(pdf, f"Analyzed alerts: {n}\nMalicious: {n_mal}, Suspicious: {n_sus}, Benign: {n_ben}", h=6)
     pdf.ln(2)
 
@@ -111,23 +135,18 @@ def generate_pdf_report(alerts_df: pd.DataFrame, enrichment: List[Dict[str, Any]
     # Only include columns that exist; do not force N/A
     cols = [c for c in preferred if c in alerts_df.columns]
 
-    sub = alerts_df.copy()
+    sub = alerts_df[cols].head(50).copy()
     if "risk_score" in sub.columns:
         try:
             sub["risk_score"] = pd.to_numeric(sub["risk_score"], errors="coerce")
         except Exception:
             pass
 
-    for _, r in sub[cols].head(50).iterrows():
-        fields = []
-        for c in cols:
-            val = r.get(c, "")
-            if isinstance(val, float) and c == "risk_score" and not pd.isna(val):
-                val = f"{val:.2f}"
-            fields.append(f"{c}: {_shorten(val, 160)}")
-        line = ", ".join(fields)
-        _write_wrapped(pdf, line, h=5)
-        pdf.ln(1)
+    lines = [
+        ", ".join(_format_field(c, val) for c, val in zip(cols, values))
+        for values in sub.itertuples(index=False, name=None)
+    ]
+    _write_lines(pdf, lines, h=5, gap=1)
 
     # Threat intel snippets (summarized)
     pdf.set_font("Arial", "B", 13)
@@ -146,5 +165,9 @@ def generate_pdf_report(alerts_df: pd.DataFrame, enrichment: List[Dict[str, Any]
             _write_wrapped(pdf, f" - {fld} AbuseIPDB: {ab_s}", h=5)
         pdf.ln(1)
 
-    pdf.output(out_path)
-    return out_path
+    pdf_bytes = bytes(pdf.output())
+    if out_path:
+        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+        with open(out_path, "wb") as f:
+            f.write(pdf_bytes)
+    return pdf_bytes